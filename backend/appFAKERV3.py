@@ -2,11 +2,13 @@ from __future__ import annotations
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import json
+import hashlib
+import threading
 import numpy as np
 import pandas as pd
 import nltk
 from dataclasses import dataclass
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Callable
 from nltk.sentiment import SentimentIntensityAnalyzer
 from sentence_transformers import SentenceTransformer, util
 from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
@@ -14,8 +16,6 @@ from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipe
 # ---------------------------------------------------------------------
 # 1. Setup + Hyperparameters
 # ---------------------------------------------------------------------
-nltk.download("vader_lexicon")
-
 '''
 TOP_K = 8
 MIN_SIM = 0.25
@@ -36,12 +36,20 @@ EPS = 1e-9
 
 TOP_K = 8
 MIN_SIM = 0.25
+RETRIEVER_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 NLI_MODEL = "roberta-large-mnli"  # or "microsoft/deberta-v3-base-mnli" for smaller/faster
 EPS = 1e-9
 ENTAIL_T = 0.60  # or even 0.55
 CONTRA_T = 0.75  # keep contradiction stricter
 MARGIN   = 0.10
 
+# Early-exit NLI: score hits in similarity order, EARLY_EXIT_BATCH at a time,
+# and stop once a source supports the claim with ENTAIL_T + MARGIN. That
+# already fixes the verdict as likely_true, so later hits can't change it;
+# only probabilities and source lists are then computed from fewer pairs.
+EARLY_EXIT = True
+EARLY_EXIT_BATCH = 2
+
 app = Flask(__name__)
 CORS(app)  # allow Chrome extension calls
 
@@ -80,16 +88,11 @@ class VerificationSystem:
     corpus_texts: List[str]
     corpus_meta: List[Dict[str, Any]]
     corpus_embeddings: np.ndarray
+    version: str
 
 
-def build_system(df: pd.DataFrame) -> VerificationSystem:
-    """Initialize tone, retriever, and NLI model."""
-    print("🔧 Building verification system ... this may take 1–2 minutes.")
-    tone = SentimentIntensityAnalyzer()
-    retriever = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-
-    corpus_texts = df["text"].tolist()
-    corpus_meta = [
+def corpus_meta_from_df(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    return [
         {
             "source": row.get("source"),
             "date": row.get("date"),
@@ -99,6 +102,42 @@ def build_system(df: pd.DataFrame) -> VerificationSystem:
         for _, row in df.iterrows()
     ]
 
+
+def corpus_version(corpus_meta: List[Dict[str, Any]]) -> str:
+    """Hash of the fact corpus alone; cached NLI scores are only valid for the same corpus."""
+    payload = json.dumps(
+        [[m.get("text"), m.get("source"), m.get("date"), m.get("topic")] for m in corpus_meta],
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def system_version(corpus_meta: List[Dict[str, Any]]) -> str:
+    """Hash of the corpus, models and verdict settings; clients drop cached verdicts when it changes."""
+    payload = json.dumps(
+        {
+            "corpus": corpus_version(corpus_meta),
+            "retriever": RETRIEVER_MODEL,
+            "nli_model": NLI_MODEL,
+            "settings": [TOP_K, MIN_SIM, ENTAIL_T, CONTRA_T, MARGIN,
+                         EARLY_EXIT, EARLY_EXIT_BATCH],
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def build_system(df: pd.DataFrame) -> VerificationSystem:
+    """Initialize tone, retriever, and NLI model."""
+    print("🔧 Building verification system ... this may take 1–2 minutes.")
+    nltk.download("vader_lexicon")
+    tone = SentimentIntensityAnalyzer()
+    retriever = SentenceTransformer(RETRIEVER_MODEL)
+
+    corpus_texts = df["text"].tolist()
+    corpus_meta = corpus_meta_from_df(df)
+
     corpus_embeddings = retriever.encode(
         corpus_texts, convert_to_numpy=True, normalize_embeddings=True
     )
@@ -119,6 +158,7 @@ def build_system(df: pd.DataFrame) -> VerificationSystem:
         corpus_texts=corpus_texts,
         corpus_meta=corpus_meta,
         corpus_embeddings=corpus_embeddings,
+        version=system_version(corpus_meta),
     )
 
 # ---------------------------------------------------------------------
@@ -143,17 +183,32 @@ def tone_summary(scores: Dict[str, float]) -> str:
         return f"slightly {base}"
 
 
-def nearest_hits(sys: VerificationSystem, query: str, top_k: int = TOP_K) -> List[Tuple[int, float]]:
+def nearest_hits(
+    sys: VerificationSystem, query: str, top_k: int = TOP_K, min_sim: float = MIN_SIM
+) -> List[Tuple[int, float]]:
     if len(sys.corpus_texts) == 0:
         return []
     q_emb = sys.retriever.encode([query], convert_to_numpy=True, normalize_embeddings=True)[0]
     sims = util.cos_sim(q_emb, sys.corpus_embeddings).cpu().numpy().ravel()
     order = np.argsort(-sims)[:top_k]
-    return [(i, float(sims[i])) for i in order if sims[i] >= MIN_SIM]
+    return [(i, float(sims[i])) for i in order if sims[i] >= min_sim]
 
 
 def nli_scores(sys: VerificationSystem, premise: str, hypothesis: str) -> Dict[str, float]:
     out = sys.nli({"text": premise, "text_pair": hypothesis})
+    return parse_nli_output(out)
+
+
+def nli_scores_batch(sys: VerificationSystem, premises: List[str], hypothesis: str) -> List[Dict[str, float]]:
+    if not premises:
+        return []
+    outs = sys.nli([{"text": p, "text_pair": hypothesis} for p in premises])
+    if len(premises) == 1 and outs and isinstance(outs[0], dict):
+        outs = [outs]
+    return [parse_nli_output(out) for out in outs]
+
+
+def parse_nli_output(out: Any) -> Dict[str, float]:
     if isinstance(out, dict):
         scores_list = [out]
     elif isinstance(out, list):
@@ -190,16 +245,58 @@ def aggregate_true_false(nli_list: List[Dict[str, float]]) -> Tuple[float, float
     return p_true / s, p_false / s
 
 
+def score_hits(
+    hits: List[Tuple[int, float]],
+    score_batch: Callable[[List[int]], List[Dict[str, float]]],
+    early_exit: bool = EARLY_EXIT,
+    batch_size: int = EARLY_EXIT_BATCH,
+    entail_t: float = ENTAIL_T,
+    margin: float = MARGIN,
+) -> Tuple[List[Dict[str, float]], int]:
+    """Score similarity-ordered hits; returns (scores for scored hits, pairs skipped)."""
+    if not early_exit:
+        return score_batch([i for i, _ in hits]), 0
+
+    batch_size = max(1, batch_size)
+    nli_list: List[Dict[str, float]] = []
+    for start in range(0, len(hits), batch_size):
+        batch = hits[start:start + batch_size]
+        nli_list.extend(score_batch([i for i, _ in batch]))
+        if any(d["entailment"] >= entail_t + margin for d in nli_list):
+            break
+    return nli_list, len(hits) - len(nli_list)
+
+
+VERDICT_MESSAGES = {
+    "likely_true": "This appears likely true based on entailment with trusted facts from your dataset.",
+    "likely_false": "This appears likely false because it contradicts trusted facts from your dataset.",
+    "cannot_verify": "I can't verify this with enough confidence. Review the closest sources below.",
+}
+
+
+def pick_verdict(
+    nli_list: List[Dict[str, float]], entail_t: float = ENTAIL_T, contra_t: float = CONTRA_T
+) -> str:
+    """Any supporting source wins; otherwise any contradicting source; else cannot_verify."""
+    if any(d["entailment"] >= entail_t for d in nli_list):
+        return "likely_true"
+    if any(d["contradiction"] >= contra_t for d in nli_list):
+        return "likely_false"
+    return "cannot_verify"
+
+
 def classify_text(sys: VerificationSystem, claim: str) -> Dict[str, Any]:
     ts = sys.tone.polarity_scores(claim)
     tone = tone_summary(ts)
     hits = nearest_hits(sys, claim, TOP_K)
 
-    nli_list, support_sources, contra_sources = [], [], []
-    for i, sim in hits:
+    nli_list, skipped = score_hits(
+        hits, lambda idxs: nli_scores_batch(sys, [sys.corpus_texts[i] for i in idxs], claim)
+    )
+
+    support_sources, contra_sources = [], []
+    for (i, sim), scores in zip(hits, nli_list):
         premise = sys.corpus_texts[i]
-        scores = nli_scores(sys, premise=premise, hypothesis=claim)
-        nli_list.append(scores)
         meta = sys.corpus_meta[i] | {
             "similarity": round(sim, 3),
             "short_text": premise[:180] + ("…" if len(premise) > 200 else ""),
@@ -211,15 +308,8 @@ def classify_text(sys: VerificationSystem, claim: str) -> Dict[str, Any]:
 
     p_true, p_false = aggregate_true_false(nli_list)
 
-    if support_sources:
-        verdict = "likely_true"
-        msg = "This appears likely true based on entailment with trusted facts from your dataset."
-    elif contra_sources:
-        verdict = "likely_false"
-        msg = "This appears likely false because it contradicts trusted facts from your dataset."
-    else:
-        verdict = "cannot_verify"
-        msg = "I can't verify this with enough confidence. Review the closest sources below."
+    verdict = pick_verdict(nli_list)
+    msg = VERDICT_MESSAGES[verdict]
 
     return {
         "input": claim,
@@ -232,6 +322,7 @@ def classify_text(sys: VerificationSystem, claim: str) -> Dict[str, Any]:
         "nearest_sources_considered": [
             sys.corpus_meta[i] | {"similarity": round(sim, 3)} for i, sim in hits
         ],
+        "version": sys.version,
         "notes": {
             "nli_model": NLI_MODEL,
             "thresholds": {
@@ -239,6 +330,10 @@ def classify_text(sys: VerificationSystem, claim: str) -> Dict[str, Any]:
                 "contradiction": CONTRA_T,
                 "min_similarity": MIN_SIM,
             },
+            # skipped > 0 only for likely_true; probabilities and source
+            # lists then cover the scored pairs only.
+            "nli_pairs_scored": len(nli_list),
+            "nli_pairs_skipped": skipped,
         },
     }
 
@@ -251,14 +346,36 @@ Data_paths = [
     "cornell_classes_2025.json"
 ]
 
-# df = load_json_df(DATA_PATH)
-dfs= []
-for path in Data_paths:
-    df_part = load_json_df(path)
-    dfs.append(df_part)
+def load_corpus(paths: List[str] = Data_paths) -> pd.DataFrame:
+    """Load and concatenate every fact file."""
+    # df = load_json_df(DATA_PATH)
+    dfs = []
+    for path in paths:
+        df_part = load_json_df(path)
+        dfs.append(df_part)
+
+    return pd.concat(dfs, ignore_index=True)
+
+
+def load_system(paths: List[str] = Data_paths) -> VerificationSystem:
+    """Load every fact file and build the verification system over them."""
+    return build_system(load_corpus(paths))
 
-df = pd.concat(dfs, ignore_index=True)
-sys_model = build_system(df)
+
+# Built on first use so tools (e.g. tune_thresholds.py) can import the
+# scoring functions without loading the models.
+sys_model: VerificationSystem | None = None
+_sys_model_lock = threading.Lock()
+
+
+def get_system() -> VerificationSystem:
+    """Return the shared verification system, building it on first call."""
+    global sys_model
+    if sys_model is None:
+        with _sys_model_lock:
+            if sys_model is None:
+                sys_model = load_system()
+    return sys_model
 
 # ---------------------------------------------------------------------
 # 5. API Routes
@@ -274,7 +391,7 @@ def predict():
         return jsonify({"error": "No text provided"}), 400
 
     try:
-        result = classify_text(sys_model, text)
+        result = classify_text(get_system(), text)
         return jsonify(result), 200
     except Exception as e:
         return jsonify({"error": f"Processing failed: {e}"}), 500
@@ -282,10 +399,16 @@ def predict():
 
 @app.route("/", methods=["GET"])
 def health():
-    return jsonify({"status": "running", "model": "VerificationSystem"})
+    return jsonify({"status": "running", "model": "VerificationSystem", "version": get_system().version})
+
+
+@app.route("/version", methods=["GET"])
+def version():
+    return jsonify({"version": get_system().version, "nli_model": NLI_MODEL})
 
 # ---------------------------------------------------------------------
 # 6. Run Flask App
 # ---------------------------------------------------------------------
 if __name__ == "__main__":
+    get_system()  # build before serving so the first request isn't slow
     app.run(host="127.0.0.1", port=5000, debug=True)
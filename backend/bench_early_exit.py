@@ -0,0 +1,100 @@
+from __future__ import annotations
+import argparse
+import json
+from typing import List, Dict, Any
+
+from appFAKERV3 import (
+    TOP_K,
+    MIN_SIM,
+    EARLY_EXIT_BATCH,
+    aggregate_true_false,
+    pick_verdict,
+    score_hits,
+)
+from tune_thresholds import SCORES_PATH, cache_mismatch
+
+# ---------------------------------------------------------------------
+# Early-exit benchmark: replays the per-pair NLI cache written by
+# tune_thresholds.py, so full and early-exit scoring see identical scores.
+# ---------------------------------------------------------------------
+def positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError("batch size must be >= 1")
+    return n
+
+
+def run_policy(claims: List[Dict[str, Any]], early_exit: bool,
+               batch_size: int) -> List[Dict[str, Any]]:
+    runs = []
+    for claim in claims:
+        # Same hits nearest_hits(TOP_K, MIN_SIM) would return.
+        pairs = [p for p in claim["pairs"][:TOP_K] if p["similarity"] >= MIN_SIM]
+        hits = [(n, p["similarity"]) for n, p in enumerate(pairs)]
+        calls = []
+
+        def score_batch(idxs: List[int]) -> List[Dict[str, float]]:
+            calls.extend(idxs)
+            return [pairs[n]["nli"] for n in idxs]
+
+        nli_list, skipped = score_hits(
+            hits, score_batch, early_exit=early_exit, batch_size=batch_size
+        )
+        p_true, p_false = aggregate_true_false(nli_list)
+        runs.append({
+            "verdict": pick_verdict(nli_list),
+            "p_true": p_true,
+            "p_false": p_false,
+            "calls": len(calls),
+            "skipped": skipped,
+        })
+    return runs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure NLI calls saved by early-exit scoring.")
+    parser.add_argument("--scores", default=SCORES_PATH, help="Score cache from tune_thresholds.py.")
+    parser.add_argument("--batch", type=positive_int, default=EARLY_EXIT_BATCH)
+    args = parser.parse_args()
+
+    with open(args.scores, "r", encoding="utf-8") as f:
+        cache = json.load(f)
+    reason = cache_mismatch(cache, TOP_K, MIN_SIM)
+    if reason:
+        raise ValueError(f"Score cache is stale ({reason}); rerun tune_thresholds.py --rescore.")
+
+    claims = cache["claims"]
+    full = run_policy(claims, False, args.batch)
+    early = run_policy(claims, True, args.batch)
+
+    n = max(len(claims), 1)
+    full_calls = sum(r["calls"] for r in full) / n
+    early_calls = sum(r["calls"] for r in early) / n
+    changed = [
+        (c["text"], f["verdict"], e["verdict"])
+        for c, f, e in zip(claims, full, early)
+        if f["verdict"] != e["verdict"]
+    ]
+    # Probabilities are averaged over scored pairs only, so they drift when early exit fires.
+    drift = [abs(f["p_true"] - e["p_true"]) for f, e in zip(full, early)]
+    exited = [(f, e) for f, e in zip(full, early) if e["skipped"]]
+    # How often early exit moved probabilities across content.js's 0.5 line.
+    crossed = sum(1 for f, e in exited if (f["p_false"] >= 0.5) != (e["p_false"] >= 0.5))
+
+    print(f"Claims:                  {len(claims)}")
+    print(f"Settings:                TOP_K={TOP_K} MIN_SIM={MIN_SIM} "
+          f"batch={args.batch}")
+    print(f"NLI calls / claim full:  {full_calls:.2f}")
+    print(f"NLI calls / claim early: {early_calls:.2f}")
+    print(f"Saved / claim:           {full_calls - early_calls:.2f} "
+          f"({(full_calls - early_calls) / max(full_calls, 1e-9):.1%})")
+    print(f"Claims exited early:     {len(exited)}")
+    print(f"p_true drift mean / max: {sum(drift) / n:.4f} / {max(drift, default=0.0):.4f}")
+    print(f"p_false crossed 0.5:     {crossed} of {len(exited)} early exits")
+    print(f"Verdicts changed:        {len(changed)}")
+    for text, before, after in changed:
+        print(f"  {before} -> {after}: {text[:80]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+from __future__ import annotations
+import argparse
+import itertools
+import json
+import os
+from typing import List, Dict, Any, Optional
+
+from appFAKERV3 import (
+    EARLY_EXIT,
+    EARLY_EXIT_BATCH,
+    NLI_MODEL,
+    aggregate_true_false,
+    corpus_meta_from_df,
+    corpus_version,
+    load_corpus,
+    pick_verdict,
+    score_hits,
+)
+
+# ---------------------------------------------------------------------
+# 1. Sweep Grid
+# ---------------------------------------------------------------------
+# Retrieval + NLI run once at max(TOP_KS) / min(MIN_SIMS); every other
+# setting is replayed from the cached per-pair scores.
+TOP_KS = [2, 4, 6, 8, 10, 12]
+MIN_SIMS = [0.20, 0.25, 0.30, 0.35]
+ENTAIL_TS = [0.55, 0.60, 0.70, 0.80]
+CONTRA_TS = [0.75, 0.80, 0.85]
+# MARGIN only sets the early-exit bar (ENTAIL_T + MARGIN), so it changes
+# cost but not the verdict. Pair counts follow the app's EARLY_EXIT setting.
+MARGINS = [0.0, 0.05, 0.10, 0.20]
+
+SCORES_PATH = "nli_scores_cache.json"
+
+LABEL_TO_VERDICT = {
+    "1": "likely_true", "t": "likely_true", "true": "likely_true", "likely_true": "likely_true",
+    "0": "likely_false", "f": "likely_false", "false": "likely_false", "likely_false": "likely_false",
+    "cannot_verify": "cannot_verify", "unverifiable": "cannot_verify", "unknown": "cannot_verify",
+}
+
+# ---------------------------------------------------------------------
+# 2. Labeled Claims + Score Cache
+# ---------------------------------------------------------------------
+def load_claims(path: str) -> List[Dict[str, str]]:
+    """Load JSON or JSONL claims with 'text' and 'label' (true / false / cannot_verify)."""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read().strip()
+    if not raw:
+        raise ValueError(f"No claims in {path}")
+    if raw[0] == "[":
+        rows = json.loads(raw)
+    else:
+        # A single object (one line or pretty-printed), else one object per line.
+        try:
+            rows = [json.loads(raw)]
+        except json.JSONDecodeError:
+            rows = [json.loads(line) for line in raw.splitlines() if line.strip()]
+    if isinstance(rows, dict):
+        rows = [rows]
+
+    claims = []
+    for row in rows:
+        text = str(row.get("text") or "").strip()
+        label = str(row.get("label", "")).lower().strip()
+        if not text:
+            continue
+        if label not in LABEL_TO_VERDICT:
+            raise ValueError(f"Unknown label {row.get('label')!r} for claim: {text[:60]}")
+        claims.append({"text": text, "expected": LABEL_TO_VERDICT[label]})
+    return claims
+
+
+def score_claims(claims: List[Dict[str, str]], top_k: int, min_sim: float) -> Dict[str, Any]:
+    """Run retrieval + NLI once per claim at the widest setting and keep raw scores."""
+    from appFAKERV3 import load_system, nearest_hits, nli_scores
+
+    sys_model = load_system()
+    scored = []
+    for n, claim in enumerate(claims, 1):
+        hits = nearest_hits(sys_model, claim["text"], top_k, min_sim=min_sim)
+        pairs = [
+            {
+                "index": int(i),
+                "similarity": sim,
+                "nli": nli_scores(sys_model, premise=sys_model.corpus_texts[i], hypothesis=claim["text"]),
+            }
+            for i, sim in hits
+        ]
+        scored.append(claim | {"pairs": pairs})
+        print(f"  scored {n}/{len(claims)} ({len(pairs)} pairs)")
+
+    return {
+        "nli_model": NLI_MODEL,
+        "top_k": top_k,
+        "min_sim": min_sim,
+        "corpus_version": corpus_version(sys_model.corpus_meta),
+        "claims": scored,
+    }
+
+
+def current_corpus_version() -> str:
+    """Corpus hash computed from the fact files alone (no models loaded)."""
+    return corpus_version(corpus_meta_from_df(load_corpus()))
+
+
+def cache_mismatch(cache: Dict[str, Any], top_k: int, min_sim: float) -> Optional[str]:
+    """Why cached scores can't be replayed for this corpus / model / grid, or None if they can."""
+    if cache.get("nli_model") != NLI_MODEL:
+        return f"NLI model changed ({cache.get('nli_model')} -> {NLI_MODEL})"
+    if cache.get("corpus_version") != current_corpus_version():
+        return "fact corpus changed"
+    if cache["top_k"] < top_k or cache["min_sim"] > min_sim:
+        return f"cache built at TOP_K={cache['top_k']}, MIN_SIM={cache['min_sim']} is narrower than the grid"
+    return None
+
+# ---------------------------------------------------------------------
+# 3. Replay + Pareto Frontier
+# ---------------------------------------------------------------------
+def replay(scored: List[Dict[str, Any]], top_k: int, min_sim: float,
+           entail_t: float, contra_t: float, margin: float) -> Dict[str, Any]:
+    """Re-apply early-exit scoring, aggregation and verdict rules to cached scores for one setting."""
+    correct, pairs_used, brier = 0, 0, []
+    for claim in scored:
+        # Cached pairs are similarity-sorted, so this matches nearest_hits(top_k, min_sim).
+        pairs = [p for p in claim["pairs"][:top_k] if p["similarity"] >= min_sim]
+        nli_list, _ = score_hits(
+            [(n, p["similarity"]) for n, p in enumerate(pairs)],
+            lambda idxs: [pairs[n]["nli"] for n in idxs],
+            early_exit=EARLY_EXIT,
+            batch_size=EARLY_EXIT_BATCH,
+            entail_t=entail_t,
+            margin=margin,
+        )
+        pairs_used += len(nli_list)
+        verdict = pick_verdict(nli_list, entail_t=entail_t, contra_t=contra_t)
+        correct += verdict == claim["expected"]
+        if claim["expected"] != "cannot_verify":
+            p_true, _ = aggregate_true_false(nli_list)
+            target = 1.0 if claim["expected"] == "likely_true" else 0.0
+            brier.append((p_true - target) ** 2)
+
+    n = max(len(scored), 1)
+    return {
+        "top_k": top_k,
+        "min_sim": min_sim,
+        "entail_t": entail_t,
+        "contra_t": contra_t,
+        "margin": margin,
+        "accuracy": correct / n,
+        "pairs_per_claim": pairs_used / n,
+        "brier": sum(brier) / len(brier) if brier else None,
+    }
+
+
+def sweep(scored: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    grid = itertools.product(TOP_KS, MIN_SIMS, ENTAIL_TS, CONTRA_TS, MARGINS)
+    return [replay(scored, *setting) for setting in grid]
+
+
+def pareto_frontier(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Configs that no cheaper (fewer NLI pairs) config matches or beats on accuracy."""
+    ordered = sorted(results, key=lambda r: (r["pairs_per_claim"], -r["accuracy"]))
+    frontier, best = [], -1.0
+    for r in ordered:
+        if r["accuracy"] > best:
+            frontier.append(r)
+            best = r["accuracy"]
+    return frontier
+
+
+def format_row(r: Dict[str, Any]) -> str:
+    brier = f"{r['brier']:.4f}" if r["brier"] is not None else "   n/a"
+    return (
+        f"{r['pairs_per_claim']:6.2f}  {r['accuracy']:.3f}  {brier}  "
+        f"TOP_K={r['top_k']:<2} MIN_SIM={r['min_sim']:.2f} "
+        f"ENTAIL_T={r['entail_t']:.2f} CONTRA_T={r['contra_t']:.2f} MARGIN={r['margin']:.2f}"
+    )
+
+# ---------------------------------------------------------------------
+# 4. CLI
+# ---------------------------------------------------------------------
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Sweep TOP_K / MIN_SIM / ENTAIL_T / CONTRA_T / MARGIN over cached NLI scores."
+    )
+    parser.add_argument("claims", help="Labeled claims (JSON or JSONL with 'text' and 'label').")
+    parser.add_argument("--scores", default=SCORES_PATH, help="Per-pair NLI score cache.")
+    parser.add_argument("--rescore", action="store_true", help="Ignore the cache and rerun the models.")
+    parser.add_argument("--min-accuracy", type=float, default=None,
+                        help="Report the cheapest config that reaches this accuracy.")
+    parser.add_argument("--out", default=None, help="Write every sweep result to this JSON file.")
+    args = parser.parse_args()
+
+    claims = load_claims(args.claims)
+    top_k, min_sim = max(TOP_KS), min(MIN_SIMS)
+
+    cache = None
+    if os.path.exists(args.scores) and not args.rescore:
+        with open(args.scores, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        reason = cache_mismatch(cache, top_k, min_sim)
+        if reason is None and [c["text"] for c in cache["claims"]] != [c["text"] for c in claims]:
+            reason = "claims changed"
+        if reason:
+            print(f"⚠️  Score cache is stale ({reason}); rescoring.")
+            cache = None
+
+    if cache is None:
+        print(f"🔧 Scoring {len(claims)} claims at TOP_K={top_k}, MIN_SIM={min_sim} ...")
+        cache = score_claims(claims, top_k, min_sim)
+        with open(args.scores, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        print(f"✅ Saved raw scores to '{args.scores}'")
+
+    # Labels may have been edited since scoring; the claims file is the source of truth.
+    scored = [c | {"expected": claim["expected"]} for c, claim in zip(cache["claims"], claims)]
+    results = sweep(scored)
+    frontier = pareto_frontier(results)
+
+    print(f"\nPareto frontier ({len(results)} configs, {len(scored)} claims)")
+    print(" pairs  acc    brier   config")
+    for r in frontier:
+        print(format_row(r))
+
+    if args.min_accuracy is not None:
+        meets = [r for r in frontier if r["accuracy"] >= args.min_accuracy]
+        if meets:
+            print(f"\nCheapest config with accuracy >= {args.min_accuracy}:")
+            print(format_row(meets[0]))
+        else:
+            print(f"\nNo config reaches accuracy >= {args.min_accuracy}.")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "frontier": frontier}, f, indent=2)
+        print(f"\n✅ Wrote sweep results to '{args.out}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,29 @@
 // background.js (MV3 service worker)
 
+const API_BASE = "http://127.0.0.1:5000";
+const API_URL = `${API_BASE}/predict`;
+const VERSION_URL = `${API_BASE}/version`;
+
+// Verdict cache in chrome.storage.local: one key per entry (ENTRY_PREFIX +
+// normalized text) plus a small index holding the backend version and
+// last-use times. Entries are dropped when the backend version changes.
+const INDEX_KEY = "verdictCacheIndex";
+const ENTRY_PREFIX = "verdict:";
+const CACHE_SCHEMA = 1;            // bump when the entry format changes
+const CACHE_MAX_ENTRIES = 200;
+const VERSION_TTL_MS = 10 * 60 * 1000;
+const TOUCH_FLUSH_MS = 2000;       // debounce for persisting LRU touches
+
+// Identical requests already in flight share one fetch (across tabs)
+const inFlight = new Map();
+
+// In-memory copy of the index; hits touch this and schedule a debounced save
+let cacheIndex = null;
+let touchTimer = null;
+
+// Serialize index writes
+let cacheQueue = Promise.resolve();
+
 // Create context menu on install
 chrome.runtime.onInstalled.addListener(() => {
   chrome.contextMenus.create({
@@ -43,3 +67,172 @@ chrome.runtime.onMessage.addListener((msg, sender, sendResponse) => {
     }
   }
 });
+
+// Content scripts ask the service worker for verdicts so results can be
+// cached and coalesced across tabs
+chrome.runtime.onMessage.addListener((msg, sender, sendResponse) => {
+  if (msg?.type !== "PREDICT") return;
+  predictCached(msg.text || "")
+    .then(sendResponse)
+    .catch((e) => sendResponse({ error: String(e) }));
+  return true; // keep channel open for async response
+});
+
+/* ------------ Cache ------------ */
+
+function normalizeText(text) {
+  return String(text || "").normalize("NFC").replace(/\s+/g, " ").trim();
+}
+
+async function predictCached(text) {
+  const key = normalizeText(text);
+  if (!key) return { error: "No text provided" };
+
+  if (inFlight.has(key)) return inFlight.get(key);
+
+  const pending = (async () => {
+    const version = await backendVersion();
+    const hit = await cacheGet(key, version);
+    return hit || fetchPrediction(key);
+  })().finally(() => inFlight.delete(key));
+  inFlight.set(key, pending);
+  return pending;
+}
+
+async function fetchPrediction(text) {
+  let data;
+  try {
+    const res = await fetch(API_URL, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ text })
+    });
+    data = await res.json();
+  } catch (e) {
+    console.error("❌ Backend request failed:", e);
+    return { error: String(e) };
+  }
+
+  // Never cache errors; a result from a newer backend resets the cache
+  if (!data?.error && data?.version) {
+    await cachePut(text, data.version, compactResult(data));
+  }
+  return data;
+}
+
+// Keep only what content.js / popup.js read from a /predict response
+function compactResult(data) {
+  const sources = (list) =>
+    (Array.isArray(list) ? list : []).map((x) => ({
+      source: x.source,
+      entailment: x.entailment,
+      contradiction: x.contradiction,
+      similarity: x.similarity,
+      short_text: x.short_text
+    }));
+  return {
+    input: data.input,
+    verdict: data.verdict,
+    probabilities: data.probabilities,
+    version: data.version,
+    supporting_sources_true: sources(data.supporting_sources_true),
+    supporting_sources_false: sources(data.supporting_sources_false),
+    nearest_sources_considered: sources(data.nearest_sources_considered),
+    cached: true
+  };
+}
+
+// Backend version, re-checked at most every VERSION_TTL_MS so repeated
+// checks skip the backend entirely. null if unknown (backend down).
+async function backendVersion() {
+  const index = await loadIndex();
+  if (index.version && Date.now() - index.checkedAt < VERSION_TTL_MS) {
+    return index.version;
+  }
+  try {
+    const res = await fetch(VERSION_URL);
+    const { version } = await res.json();
+    if (version) {
+      await indexUpdate((idx) => resetIfStale(idx, version));
+      return version;
+    }
+  } catch (e) {
+    console.warn("Backend version check failed:", e);
+  }
+  return index.version || null;
+}
+
+// Read-only on a hit: one storage get, no write
+async function cacheGet(key, version) {
+  if (!version) return null;
+  const index = await loadIndex();
+  if (index.version !== version || !(key in index.used)) return null;
+
+  const storageKey = ENTRY_PREFIX + key;
+  const { [storageKey]: entry } = await chrome.storage.local.get([storageKey]);
+  if (!entry || entry.version !== version) return null;
+
+  index.used[key] = Date.now(); // LRU touch
+  scheduleTouchFlush();
+  return entry.data;
+}
+
+// Persist LRU touches soon after hits (well before the service worker idles
+// out), batching several hits into one small index write
+function scheduleTouchFlush() {
+  if (touchTimer) return;
+  touchTimer = setTimeout(() => {
+    touchTimer = null;
+    indexUpdate((idx) => idx);
+  }, TOUCH_FLUSH_MS);
+}
+
+function cachePut(key, version, data) {
+  // Reset first so a version change can't remove the entry written below
+  return indexUpdate(async (idx) => {
+    idx = await resetIfStale(idx, version);
+    await chrome.storage.local.set({ [ENTRY_PREFIX + key]: { version, data } });
+    idx.used[key] = Date.now();
+
+    const keys = Object.keys(idx.used);
+    if (keys.length > CACHE_MAX_ENTRIES) {
+      const evicted = keys
+        .sort((a, b) => idx.used[a] - idx.used[b])
+        .slice(0, keys.length - CACHE_MAX_ENTRIES);
+      evicted.forEach((k) => delete idx.used[k]);
+      await chrome.storage.local.remove(evicted.map((k) => ENTRY_PREFIX + k));
+    }
+    return idx;
+  });
+}
+
+async function resetIfStale(index, version) {
+  if (index.version !== version) {
+    await chrome.storage.local.remove(Object.keys(index.used).map((k) => ENTRY_PREFIX + k));
+    index = emptyIndex();
+    index.version = version;
+  }
+  index.checkedAt = Date.now();
+  return index;
+}
+
+function emptyIndex() {
+  return { schema: CACHE_SCHEMA, version: null, checkedAt: 0, used: {} };
+}
+
+async function loadIndex() {
+  if (!cacheIndex) {
+    const { [INDEX_KEY]: stored } = await chrome.storage.local.get([INDEX_KEY]);
+    cacheIndex = cacheIndex || (stored?.schema === CACHE_SCHEMA ? stored : emptyIndex());
+  }
+  return cacheIndex;
+}
+
+function indexUpdate(fn) {
+  const run = cacheQueue.then(async () => {
+    cacheIndex = await fn(await loadIndex());
+    await chrome.storage.local.set({ [INDEX_KEY]: cacheIndex });
+  });
+  cacheQueue = run.catch(() => {});
+  return run;
+}
@@ -1,7 +1,5 @@
 // content.js
 
-const API_URL = "http://127.0.0.1:5000/predict";
-
 let lastSelectionRange = null;
 
 // Debug: confirm injection
@@ -21,14 +19,10 @@ chrome.runtime.onMessage.addListener(async (msg, sender, sendResponse) => {
   const text = (msg.text || "").trim();
   if (!text) return;
 
+  // background.js owns the backend call (cache + in-flight coalescing)
   let data;
   try {
-    const res = await fetch(API_URL, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ text })
-    });
-    data = await res.json();
+    data = await chrome.runtime.sendMessage({ type: "PREDICT", text });
   } catch (e) {
     console.error("❌ Backend request failed:", e);
     data = { error: String(e) };